@@ -1,23 +1,69 @@
 import sys
 import time
+import struct
+from collections import namedtuple
 import serial
 from serial.tools.list_ports import comports
 
 
+_Stage = namedtuple('_Stage', 'um_per_count limit_um counts_per_um')
+
 _SUPPORTED_STAGES = {
-    'ZFM2020': (0.2116667, 1e3 * 12.7),
-    'ZFM2030': (0.2116667, 1e3 * 12.7),
-    'MMP-2XY': (0.5, 1e3 * 25.4),
-    'PLS-X': (0.2116667, 1e3 * 12.7),
-    'PLS-XY': (0.2116667, 1e3 * 12.7)
+    'ZFM2020': _Stage(0.2116667, 1e3 * 12.7, 1 / 0.2116667),
+    'ZFM2030': _Stage(0.2116667, 1e3 * 12.7, 1 / 0.2116667),
+    'MMP-2XY': _Stage(0.5, 1e3 * 25.4, 1 / 0.5),
+    'PLS-X': _Stage(0.2116667, 1e3 * 12.7, 1 / 0.2116667),
+    'PLS-XY': _Stage(0.2116667, 1e3 * 12.7, 1 / 0.2116667)
 }
 
+# Little-endian packers for the fixed-size fields of the serial protocol
+_I32LE = struct.Struct('<i')
+_U8LE = struct.Struct('<B')
+_U16LE = struct.Struct('<H')
+
+# Serial read timeout per attempt, and total time to wait for a complete response
+_PORT_TIMEOUT_S = 0.1
+_RESPONSE_TIMEOUT_S = 0.5
+
+# Age below which a cached encoder reading is reused when planning a move
+_ENCODER_COUNTS_MAX_AGE_S = 0.05
+
 
 def supported_stages() -> dict:
     """Return the supported stages dictionary."""
     return _SUPPORTED_STAGES
 
 
+def _print_log(fmt: str, *args) -> None:
+    """Print a printf-style message, formatting it only when called."""
+    print(fmt % args)
+
+
+def _no_log(fmt: str, *args) -> None:
+    """Discard a log message without formatting it."""
+
+
+class _ChannelState:
+    """Stage constants, precomputed commands and encoder state of a single channel."""
+
+    __slots__ = ('um_per_count', 'counts_per_um', 'reverse_sign', 'limit_um', 'get_cmd', 'move_prefix', 'zero_prefix',
+                 'encoder_counts', 'encoder_counts_time', 'encoder_counts_tol', 'target_encoder_counts', 'target_encoder_counts_tol',
+                 'commanded_encoder_counts')
+
+    def __init__(self, channel: int, stage: str, reverse: bool):
+        self.um_per_count, self.limit_um, self.counts_per_um = _SUPPORTED_STAGES[stage]
+        self.reverse_sign = -1 if reverse else 1
+        self.get_cmd = b'\x0a\x04' + _U8LE.pack(channel) + b'\x00\x00\x00'
+        self.move_prefix = b'\x53\x04\x06\x00\x00\x00' + _U16LE.pack(channel)
+        self.zero_prefix = b'\x09\x04\x06\x00\x00\x00' + _U16LE.pack(channel)
+        self.encoder_counts = None
+        self.encoder_counts_time = 0.0
+        self.encoder_counts_tol = 1  # Can hang if < 1 count
+        self.target_encoder_counts = None
+        self.commanded_encoder_counts = None  # Last target sent to the controller, kept after the move finishes or times out
+        self.target_encoder_counts_tol = None
+
+
 class MCM3000:
     """
     Serial interface for MCM3000 motorized stage controller from Thorlabs.
@@ -36,15 +82,17 @@ class MCM3000:
         self.reverse = reverse
         self.verbose = verbose
         self.very_verbose = very_verbose
+        self._vv_log = _print_log if very_verbose else _no_log
 
         # Automatically detect the MCM3000 on any port if specified
         if which_port == 'auto':
             which_port = None
-            for port in list(comports()):
+            for port in comports():
                 if "MCM3000" in port.description:
                     if self.verbose:
                         print('Found MCM3000 on port', port.name)
                     which_port = str(port.name)
+                    break
             if which_port is None:
                 raise IOError('Unable to automatically detect MCM3000 on any port.')
 
@@ -53,7 +101,7 @@ class MCM3000:
             print(f"{self.name}: opening...", end='')
 
         try:
-            self.port = serial.Serial(port=which_port, baudrate=460800, timeout=5)
+            self.port = serial.Serial(port=which_port, baudrate=460800, timeout=_PORT_TIMEOUT_S)
         except serial.serialutil.SerialException:
             raise IOError(f'{self.name}: no connection on port {which_port}')
 
@@ -64,166 +112,345 @@ class MCM3000:
         for element in self.reverse:
             assert isinstance(element, bool), 'Reverse elements must be boolean'
 
-        self._encoder_counts = [None] * 3
-        self._encoder_counts_tol = [1] * 3  # Can hang if < 1 count
-        self._target_encoder_counts = [None] * 3
-        self._um_per_count = [None] * 3
-        self._position_limit_um = [None] * 3
         self.position_um = [None] * 3
-        self.channels = []
+        self._ch = {}
 
         for channel, stage in enumerate(self.stages):
             if stage is not None:
                 assert stage in _SUPPORTED_STAGES, f"{self.name}: stage '{stage}' not supported"
-                self.channels.append(channel)
-                self._um_per_count[channel] = _SUPPORTED_STAGES[stage][0]
-                self._position_limit_um[channel] = _SUPPORTED_STAGES[stage][1]
-                self._get_encoder_counts(channel)
+                self._ch[channel] = _ChannelState(channel, stage, self.reverse[channel])
 
-        self.channels = tuple(self.channels)
+        self.channels = tuple(self._ch)
+        self._get_encoder_counts_all()
         if self.verbose:
             print(f"{self.name}: stages: {self.stages}")
             print(f"{self.name}: reverse: {self.reverse}")
-            print(f"{self.name}: um_per_count: {self._um_per_count}")
-            print(f"{self.name}: position_limit_um: {self._position_limit_um}")
+            print(f"{self.name}: um_per_count: { {c: st.um_per_count for c, st in self._ch.items()} }")
+            print(f"{self.name}: position_limit_um: { {c: st.limit_um for c, st in self._ch.items()} }")
             print(f"{self.name}: position_um: {self.position_um}")
 
+    def _assert_channel(self, channel: int) -> None:
+        """Check that a stage is connected on the specified channel."""
+        assert channel in self._ch, f"{self.name}: channel '{channel}' is not available"
+
     def _send(self, cmd: bytes, channel: int, response_bytes: int = None) -> bytes:
         """Send a command to the specified channel and optionally read the response."""
-        assert channel in self.channels, f"{self.name}: channel '{channel}' is not available"
-        if self.very_verbose:
-            print(f'{self.name} (ch{channel}): sending cmd: {cmd}')
+        self._vv_log('%s (ch%i): sending cmd: %s', self.name, channel, cmd)
         self.port.write(cmd)
-        response = self.port.read(response_bytes) if response_bytes is not None else None
-        assert self.port.inWaiting() == 0, f"{self.name}: unexpected data in the input buffer"
+        response = self._read(response_bytes) if response_bytes is not None else None
         if self.very_verbose:
-            print(f'{self.name} (ch{channel}): -> response: {response}')
+            # Checking the input buffer costs a syscall per command, so only do it when debugging
+            assert self.port.inWaiting() == 0, f"{self.name}: unexpected data in the input buffer"
+        self._vv_log('%s (ch%i): -> response: %s', self.name, channel, response)
+        return response
+
+    def _read(self, response_bytes: int) -> bytes:
+        """Read exactly `response_bytes` from the port, retrying short reads for up to `_RESPONSE_TIMEOUT_S`."""
+        response = self.port.read(response_bytes)
+        if len(response) < response_bytes:
+            deadline = time.monotonic() + _RESPONSE_TIMEOUT_S
+            while len(response) < response_bytes and time.monotonic() < deadline:
+                response += self.port.read(response_bytes - len(response))
+            if len(response) < response_bytes:
+                # Drop partial or late bytes so later responses stay aligned
+                self.port.reset_input_buffer()
+                raise IOError(f'{self.name}: incomplete response {response} ({response_bytes} bytes expected)')
         return response
 
     def _encoder_counts_to_um(self, channel: int, encoder_counts: int) -> float:
         """Convert encoder counts to micrometers for the specified channel."""
-        um = encoder_counts * self._um_per_count[channel]
-        if self.reverse[channel]:
-            um = -um + 0  # +0 avoids -0.0
-        if self.very_verbose:
-            print(f'{self.name} (ch{channel}): -> encoder counts {encoder_counts} = {um:.2f}um')
+        st = self._ch[channel]
+        um = encoder_counts * st.um_per_count * st.reverse_sign + 0  # +0 avoids -0.0
+        self._vv_log('%s (ch%i): -> encoder counts %i = %.2fum', self.name, channel, encoder_counts, um)
         return um
 
     def _um_to_encoder_counts(self, channel: int, um: float) -> int:
         """Convert micrometers to encoder counts for the specified channel."""
-        encoder_counts = int(round(um / self._um_per_count[channel]))
-        if self.reverse[channel]:
-            encoder_counts = -encoder_counts + 0  # +0 avoids -0.0
-        if self.very_verbose:
-            print(f'{self.name} (ch{channel}): -> {um:.2f}um = encoder counts {encoder_counts}')
+        st = self._ch[channel]
+        encoder_counts = int(round(um * st.counts_per_um)) * st.reverse_sign
+        self._vv_log('%s (ch%i): -> %.2fum = encoder counts %i', self.name, channel, um, encoder_counts)
         return encoder_counts
 
-    def _get_encoder_counts(self, channel: int) -> int:
-        """Get the current encoder counts for the specified channel."""
-        if self.very_verbose:
-            print(f'{self.name} (ch{channel}): getting encoder counts')
-        channel_byte = channel.to_bytes(1, byteorder='little')
-        cmd = b'\x0a\x04' + channel_byte + b'\x00\x00\x00'
+    def _get_encoder_counts(self, channel: int, max_age_s: float = 0.0) -> int:
+        """Get the current encoder counts for the specified channel, reusing a reading younger than `max_age_s`."""
+        st = self._ch[channel]
+        if max_age_s > 0 and time.monotonic() - st.encoder_counts_time < max_age_s:
+            return st.encoder_counts
+        self._vv_log('%s (ch%i): getting encoder counts', self.name, channel)
+        cmd = st.get_cmd
         response = self._send(cmd, channel, response_bytes=12)
-        assert response[6:7] == channel_byte, f"{self.name} (ch{channel}): response channel mismatch"
-        self._encoder_counts[channel] = int.from_bytes(response[-4:], byteorder='little', signed=True)
-        if self.very_verbose:
-            print(f'{self.name} (ch{channel}): -> encoder counts = {self._encoder_counts[channel]}')
-        self.position_um[channel] = self._encoder_counts_to_um(channel, self._encoder_counts[channel])
-        return self._encoder_counts[channel]
+        return self._parse_encoder_counts(channel, response)
+
+    def _parse_encoder_counts(self, channel: int, response: bytes) -> int:
+        """Parse a 12-byte encoder counts response and update the cached position for the specified channel."""
+        assert response[6] == channel, f"{self.name} (ch{channel}): response channel mismatch"
+        encoder_counts = _I32LE.unpack_from(response, 8)[0]
+        st = self._ch[channel]
+        st.encoder_counts = encoder_counts
+        st.encoder_counts_time = time.monotonic()
+        self._vv_log('%s (ch%i): -> encoder counts = %i', self.name, channel, encoder_counts)
+        self.position_um[channel] = self._encoder_counts_to_um(channel, encoder_counts)
+        return encoder_counts
 
-    def _set_encoder_counts_to_zero(self, channel: int) -> None:
-        """Set the encoder counts to zero for the specified channel."""
+    def _get_encoder_counts_all(self) -> list:
+        """Get the current encoder counts for all channels, pipelining the queries into a single read."""
+        if not self.channels:
+            return []
+        self._vv_log('%s: getting encoder counts for channels %s', self.name, self.channels)
+        for st in self._ch.values():
+            self.port.write(st.get_cmd)
+        response = self._read(12 * len(self.channels))
+        if self.very_verbose:
+            assert self.port.inWaiting() == 0, f"{self.name}: unexpected data in the input buffer"
+        self._vv_log('%s: -> response: %s', self.name, response)
+        for i, channel in enumerate(self.channels):
+            self._parse_encoder_counts(channel, response[12 * i:12 * (i + 1)])
+        return [self._ch[channel].encoder_counts for channel in self.channels]
+
+    def _set_encoder_counts_to_zero(self, channel: int, timeout_s: float = 5) -> None:
+        """Set the encoder counts to zero for the specified channel, raising IOError if not confirmed within the timeout."""
+        self._assert_channel(channel)
         if self.verbose:
             print(f'{self.name} (ch{channel}): setting encoder counts to zero')
-        channel_byte = channel.to_bytes(2, byteorder='little')
-        encoder_bytes = (0).to_bytes(4, byteorder='little', signed=True)
-        cmd = b'\x09\x04\x06\x00\x00\x00' + channel_byte + encoder_bytes
+        encoder_bytes = _I32LE.pack(0)
+        cmd = self._ch[channel].zero_prefix + encoder_bytes
         self._send(cmd, channel)
-        while True:
-            self._get_encoder_counts(channel)
-            if self._encoder_counts[channel] == 0:
-                break
+        now = time.monotonic
+        start = now()
+        while self._get_encoder_counts(channel) != 0:
+            elapsed = now() - start
+            if elapsed >= timeout_s:
+                raise IOError(f'{self.name} (ch{channel}): encoder counts not zeroed after {timeout_s}s')
+            self._poll_sleep(elapsed, timeout_s)
         if self.verbose:
             print(f'{self.name} (ch{channel}): -> done')
 
-    def _move_to_encoder_count(self, channel: int, encoder_counts: int, timeout_s: float = None) -> None:
+    def _tolerance_counts(self, channel: int, tolerance_um: float = None) -> int:
+        """Convert a move tolerance in micrometers to encoder counts, defaulting to the channel tolerance."""
+        if tolerance_um is None:
+            return self._ch[channel].encoder_counts_tol
+        return max(1, int(round(tolerance_um * self._ch[channel].counts_per_um)))  # Can hang if < 1 count
+
+    def _move_to_encoder_count(self, channel: int, encoder_counts: int, timeout_s: float = None, tolerance_counts: int = None) -> None:
         """Move to the specified encoder counts for the given channel."""
-        if self._target_encoder_counts[channel] is not None:
+        st = self._ch[channel]
+        if st.target_encoder_counts not in (None, encoder_counts):
             self._finish_move(channel)
-        if self.very_verbose:
-            print(f'{self.name} (ch{channel}): moving to encoder counts = {encoder_counts}')
-        self._target_encoder_counts[channel] = encoder_counts
-        encoder_bytes = encoder_counts.to_bytes(4, byteorder='little', signed=True)
-        channel_bytes = channel.to_bytes(2, byteorder='little')
-        cmd = b'\x53\x04\x06\x00\x00\x00' + channel_bytes + encoder_bytes
-        self._send(cmd, channel)
-        if timeout_s is not None:
-            self._finish_move(channel, timeout_s)
+        self._vv_log('%s (ch%i): moving to encoder counts = %i', self.name, channel, encoder_counts)
+        st.target_encoder_counts = encoder_counts
+        st.commanded_encoder_counts = encoder_counts
+        st.target_encoder_counts_tol = st.encoder_counts_tol if tolerance_counts is None else tolerance_counts
+        if timeout_s is None:
+            self._send(st.move_prefix + _I32LE.pack(encoder_counts), channel)
+        else:
+            # Fuse the first completion poll into the move command since _finish_move needs it anyway
+            polled_counts = self._move_and_poll(channel, encoder_counts)
+            self._finish_move(channel, timeout_s, encoder_counts=polled_counts)
+
+    def _move_and_poll(self, channel: int, encoder_counts: int) -> int:
+        """Send a move command and an encoder counts query in a single write, returning the polled encoder counts."""
+        encoder_bytes = _I32LE.pack(encoder_counts)
+        st = self._ch[channel]
+        cmd = st.move_prefix + encoder_bytes + st.get_cmd
+        response = self._send(cmd, channel, response_bytes=12)
+        return self._parse_encoder_counts(channel, response)
 
-    def _finish_move(self, channel: int, timeout_s: float = 5) -> None:
-        """Wait for the move to finish or timeout."""
-        if self._target_encoder_counts[channel] is None:
+    @staticmethod
+    def _poll_sleep(elapsed_s: float, timeout_s: float) -> None:
+        """Back off between polls: none for the first 100 ms, 5 ms up to 1 s, then 50 ms, never past the timeout."""
+        if elapsed_s < 0.1:
             return
-        start = time.time()
-        while time.time() - start < timeout_s:
-            encoder_counts = self._get_encoder_counts(channel)
-            target = self._target_encoder_counts[channel]
-            tolerance = self._encoder_counts_tol[channel]
-            if self.very_verbose:
-                print(f'{self.name} (ch{channel}): {abs(target - encoder_counts)} counts from target (tolerance {tolerance})')
-                time.sleep(0.1)
-            if abs(target - encoder_counts) <= tolerance:
+        sleep_s = 0.005 if elapsed_s < 1.0 else 0.05
+        sleep_s = min(sleep_s, timeout_s - elapsed_s)
+        if sleep_s > 0:
+            time.sleep(sleep_s)
+
+    def _finish_move(self, channel: int, timeout_s: float = 5, encoder_counts: int = None) -> None:
+        """Wait for the move to finish or timeout, optionally starting from already polled encoder counts."""
+        st = self._ch[channel]
+        if st.target_encoder_counts is None:
+            return
+        now = time.monotonic
+        start = now()
+        elapsed = 0.0
+        while elapsed < timeout_s:
+            if encoder_counts is None:
+                encoder_counts = self._get_encoder_counts(channel)
+            target = st.target_encoder_counts
+            tolerance = st.target_encoder_counts_tol
+            error = abs(target - encoder_counts)
+            self._vv_log('%s (ch%i): %i counts from target (tolerance %i)', self.name, channel, error, tolerance)
+            if error <= tolerance:
                 if self.verbose:
                     print(f'\n{self.name} (ch{channel}): -> finished move.')
-                self._target_encoder_counts[channel] = None
+                st.target_encoder_counts = None
                 return
+            encoder_counts = None
+            elapsed = now() - start
+            self._poll_sleep(elapsed, timeout_s)
         if self.verbose:
-            print(f'\n{self.name} (ch{channel}): -> timed out {abs(self._target_encoder_counts[channel] - self._get_encoder_counts(channel))} steps from target.')
-        self._target_encoder_counts[channel] = None
-
-    def _legalize_move_um(self, channel: int, move_um: float, relative: bool) -> float:
-        """Ensure the requested move is within legal limits."""
+            print(f'\n{self.name} (ch{channel}): -> timed out {abs(st.target_encoder_counts - self._get_encoder_counts(channel))} steps from target.')
+        st.target_encoder_counts = None
+
+    def _finish_moves(self, channels: tuple, timeout_s: float = 5) -> None:
+        """Wait for the moves on several channels to finish or timeout, polling all channels in one pipelined read."""
+        pending = [channel for channel in channels if self._ch[channel].target_encoder_counts is not None]
+        now = time.monotonic
+        start = now()
+        # Poll at least once, so channels that have already arrived are not reported as timed out
+        while pending:
+            self._get_encoder_counts_all()
+            for channel in tuple(pending):
+                st = self._ch[channel]
+                if abs(st.target_encoder_counts - st.encoder_counts) <= st.target_encoder_counts_tol:
+                    if self.verbose:
+                        print(f'\n{self.name} (ch{channel}): -> finished move.')
+                    st.target_encoder_counts = None
+                    pending.remove(channel)
+            elapsed = now() - start
+            if elapsed >= timeout_s:
+                break
+            self._poll_sleep(elapsed, timeout_s)
+        for channel in pending:
+            st = self._ch[channel]
+            if self.verbose:
+                print(f'\n{self.name} (ch{channel}): -> timed out {abs(st.target_encoder_counts - st.encoder_counts)} steps from target.')
+            st.target_encoder_counts = None
+
+    def _legalize_move_um(self, channel: int, move_um: float, relative: bool) -> tuple:
+        """Ensure the requested move is within legal limits, returning the legal position and its encoder counts."""
         if self.verbose:
             print(f'{self.name} (ch{channel}): requested move_um = {move_um:.2f} (relative={relative})')
         if relative:
-            self._get_encoder_counts(channel)
+            self._get_encoder_counts(channel, max_age_s=_ENCODER_COUNTS_MAX_AGE_S)
             move_um += self.position_um[channel]
-        limit_um = self._position_limit_um[channel]
+        limit_um = self._ch[channel].limit_um
         assert -limit_um <= move_um <= limit_um, f"{self.name}: ch{channel} -> move_um ({move_um:.2f}) exceeds position_limit_um ({limit_um:.2f})"
         move_counts = self._um_to_encoder_counts(channel, move_um)
         legal_move_um = self._encoder_counts_to_um(channel, move_counts)
         if self.verbose:
             print(f'{self.name} (ch{channel}): -> legal move_um = {legal_move_um:.2f} ({move_um:.2f} requested)')
-        return legal_move_um
+        return legal_move_um, move_counts
 
     def get_position_um(self, channel: int) -> float:
         """Get the current position in micrometers for the specified channel."""
-        self._get_encoder_counts(channel)
+        self._assert_channel(channel)
+        self._get_encoder_counts(channel, max_age_s=0)
         return self.position_um[channel]
 
     def get_position_encoder_counts(self, channel: int) -> int:
         """Get the current position in encoder counts for the specified channel."""
+        self._assert_channel(channel)
         return int(self._get_encoder_counts(channel))
 
+    def get_positions_um(self) -> list:
+        """Get the current positions in micrometers for all channels, indexed by channel, in a single serial round."""
+        self._get_encoder_counts_all()
+        return list(self.position_um)
+
+    def get_positions_encoder_counts(self) -> list:
+        """Get the current positions in encoder counts for all channels, indexed by channel, in a single serial round."""
+        self._get_encoder_counts_all()
+        return [self._ch[channel].encoder_counts if channel in self._ch else None for channel in range(3)]
+
     def get_position_limits_um(self, channel: int) -> tuple:
         """Get the position limits in micrometers for the specified channel."""
-        return -self._position_limit_um[channel], self._position_limit_um[channel]
+        self._assert_channel(channel)
+        limit_um = self._ch[channel].limit_um
+        return -limit_um, limit_um
 
-    def move_um(self, channel: int, move_um: float, relative: bool = True, timeout_s: float = None) -> float:
-        """Move the specified channel by the given distance in micrometers."""
-        legal_move_um = self._legalize_move_um(channel, move_um, relative)
+    def move_um(self, channel: int, move_um: float, relative: bool = True, timeout_s: float = None, tolerance_um: float = None) -> float:
+        """
+        Move the specified channel by the given distance in micrometers.
+        :param channel: The channel to move.
+        :param move_um: The distance to move, or the target position if `relative` is False, in micrometers.
+        :param relative: Whether `move_um` is relative to the current position.
+        :param timeout_s: Time to wait for the move to finish, or None to return without waiting.
+        :param tolerance_um: Distance from the target at which the move is considered finished, at least one encoder count. Defaults to one encoder count.
+        :return: The legal target position in micrometers.
+        """
+        self._assert_channel(channel)
+        legal_move_um, encoder_counts = self._legalize_move_um(channel, move_um, relative)
+        tolerance_counts = self._tolerance_counts(channel, tolerance_um)
+        st = self._ch[channel]
+        # Only skip when the controller was already sent this exact target and a recent reading shows it arrived
+        fresh = time.monotonic() - st.encoder_counts_time < _ENCODER_COUNTS_MAX_AGE_S
+        if fresh and st.commanded_encoder_counts == encoder_counts:
+            if abs(encoder_counts - st.encoder_counts) <= tolerance_counts:
+                if self.verbose:
+                    print(f'{self.name} (ch{channel}): already within tolerance of position_um = {legal_move_um:.2f}')
+                return legal_move_um
         if self.verbose:
             print(f'{self.name} (ch{channel}): moving to position_um = {legal_move_um:.2f}')
-        encoder_counts = self._um_to_encoder_counts(channel, legal_move_um)
-        self._move_to_encoder_count(channel, encoder_counts, timeout_s)
+        self._move_to_encoder_count(channel, encoder_counts, timeout_s, tolerance_counts)
         return legal_move_um
 
-    def close(self) -> None:
-        """Close the serial port connection."""
+    def move_um_all(self, targets_um: tuple, timeout_s: float = None, tolerance_um: float = None) -> list:
+        """
+        Move several channels to absolute positions in micrometers, sending all move commands in a single write.
+        :param targets_um: Tuple of target positions indexed by channel, with None for channels that should not move.
+        :param timeout_s: Time to wait for all moves to finish, or None to return without waiting.
+        :param tolerance_um: Distance from the target at which a move is considered finished, at least one encoder count. Defaults to one encoder count.
+        :return: The legal target positions in micrometers, indexed by channel.
+        """
+        assert len(targets_um) == 3, 'Targets tuple must have length 3'
+        legal_targets_um = [None] * 3
+        targets_counts = {}
+        # Legalize every target before touching any channel state, so a rejected target leaves no move pending
+        for channel, target_um in enumerate(targets_um):
+            if target_um is None:
+                continue
+            self._assert_channel(channel)
+            legal_targets_um[channel], targets_counts[channel] = self._legalize_move_um(channel, target_um, relative=False)
+        cmds = []
+        for channel, encoder_counts in targets_counts.items():
+            st = self._ch[channel]
+            if st.target_encoder_counts not in (None, encoder_counts):
+                self._finish_move(channel)
+            st.target_encoder_counts = encoder_counts
+            st.commanded_encoder_counts = encoder_counts
+            st.target_encoder_counts_tol = self._tolerance_counts(channel, tolerance_um)
+            cmds.append(st.move_prefix + _I32LE.pack(encoder_counts))
         if self.verbose:
-            print(f"{self.name}: closing...", end=' ')
-        self.port.close()
+            print(f'{self.name}: moving to position_um = {legal_targets_um}')
+        cmd = b''.join(cmds)
+        self._vv_log('%s: sending cmd: %s', self.name, cmd)
+        self.port.write(cmd)
+        if timeout_s is not None:
+            self._finish_moves(tuple(targets_counts), timeout_s)
+        return legal_targets_um
+
+    def __enter__(self):
+        """Enter a context that closes the controller on exit."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """Close the controller, without waiting for pending moves if an exception is propagating."""
+        if exc_type is None:
+            self.close()
+            return
+        # Don't wait on the hardware while unwinding, and don't let a failing link mask the original exception
+        for st in self._ch.values():
+            st.target_encoder_counts = None
+        try:
+            self.close()
+        except IOError:
+            pass
+
+    def close(self) -> None:
+        """Finish any pending moves, discard unread input and close the serial port connection."""
+        if not self.port.is_open:
+            return
+        try:
+            for channel in self.channels:
+                self._finish_move(channel)
+        finally:
+            if self.verbose:
+                print(f"{self.name}: closing...", end=' ')
+            try:
+                self.port.reset_input_buffer()
+            finally:
+                self.port.close()
         if self.verbose:
             print("done.")
 
@@ -239,30 +466,33 @@ if __name__ == '__main__':
 
     input('\n\nWARNING!!! This script will attempt to home (zero) all 3 motors connected to the MCM3000! If you are uncertain where these zeros are, COLLISIONS MAY OCCUR! Press ENTER to proceed.')
 
-    for ch in range(3):
-        controller.move_um(ch, 0, relative=False, timeout_s=False)
+    controller.move_um_all((0, 0, 0), timeout_s=False)
 
     start = time.time()
     while time.time() - start < 5.0:
+        positions_encoder = controller.get_positions_encoder_counts()
+        positions_um = controller.position_um  # Updated by the same batched read
         for ch in range(3):
             print('\n# Homing channel', ch, '...')
-            print('-> position_um = {:.2f}'.format(controller.get_position_um(ch)))
-            print('-> position_encoder = {:.2f}'.format(controller.get_position_encoder_counts(ch)))
+            print('-> position_um = {:.2f}'.format(positions_um[ch]))
+            print('-> position_encoder = {:.2f}'.format(positions_encoder[ch]))
         time.sleep(1)
 
+    positions_encoder = controller.get_positions_encoder_counts()
+    positions_um = controller.position_um  # Updated by the same batched read
     for ch in range(3):
         print('\n# Final position for channel', ch)
-        print('-> position_um = {:.2f}'.format(controller.get_position_um(ch)))
-        print('-> position_encoder = {:.2f}'.format(controller.get_position_encoder_counts(ch)))
+        print('-> position_um = {:.2f}'.format(positions_um[ch]))
+        print('-> position_encoder = {:.2f}'.format(positions_encoder[ch]))
 
     input('Press ENTER to proceed with testing.')
 
     for channel in range(3):
         print('\n# Some relative moves:')
         for _ in range(3):
-            controller.move_um(channel, 10, timeout_s=10)
+            controller.move_um(channel, 10, timeout_s=10, tolerance_um=0.5)
         for _ in range(3):
-            controller.move_um(channel, -10, timeout_s=10)
+            controller.move_um(channel, -10, timeout_s=10, tolerance_um=0.5)
 
         print('\n# Encoder tolerance check:')
         for _ in range(3):